@@ -0,0 +1,496 @@
+# attendance_cli.py
+"""
+Headless command-line front end for the attendance tracker.
+
+Reads and writes the same attendance_pro_data.json used by the GUI apps, but
+never imports tkinter/customtkinter, so it can run from cron or over SSH.
+
+Single command:
+    python attendance_cli.py mark "Maths" attended
+    python attendance_cli.py --student "Alice" summary
+
+Batch mode (one command per line on stdin, all applied with a single save):
+    python attendance_cli.py batch < ops.txt
+
+Changes can be exchanged with other machines through a shared folder with
+`sync-init` / `sync` (see attendance_sync.py).
+
+Weekly slots (`set-slots`, `add-holiday`, `set-term-end`) let `generate` create
+each day's classes for every student at once; see timetable.py.
+
+Finished terms are moved to compressed archives with `close-term` and can be
+browsed with `archives` / `archive-summary` (see term_archive.py).
+"""
+import argparse
+import datetime
+import json
+import os
+import shlex
+import sys
+
+import attendance_sync
+import term_archive
+import timetable
+
+# ---------------- CONFIG ----------------
+DATA_FILE = "attendance_pro_data.json"
+DEFAULT_STUDENT = "Default Student"
+
+
+class CLIError(Exception):
+    """Raised for user errors (unknown subject, bad numbers, ...)."""
+
+
+# ---------------- Helpers ----------------
+def empty_data():
+    return {"students": {DEFAULT_STUDENT: {"info": {}, "subjects": {}}}, "settings": {"goal": 75.0}}
+
+
+def load_data(path=DATA_FILE):
+    """
+    Loads data from JSON and returns (data, legacy).
+
+    A file in tracker_app.py's single-student format (top-level 'subjects') is
+    read as a "Default Student" like attendance_tracker_updated.load_data(),
+    and legacy=True tells save_data() to write it back in that format so
+    tracker_app.py keeps working. A file that is not valid JSON is an error:
+    unlike the GUI, the CLI runs unattended and must not overwrite it.
+    """
+    if not os.path.exists(path):
+        return empty_data(), False
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except json.JSONDecodeError as e:
+        raise CLIError(f"'{path}' is not valid JSON ({e}); fix or move it first.")
+    if "students" not in data and "subjects" in data:
+        data["students"] = {DEFAULT_STUDENT: {"info": {}, "subjects": data.pop("subjects")}}
+        data.setdefault("settings", {"goal": 75.0})
+        return data, True
+    if "students" not in data:
+        data["students"] = {DEFAULT_STUDENT: {"info": {}, "subjects": {}}}
+    if "settings" not in data:
+        data["settings"] = {"goal": 75.0}
+    for s, val in list(data["students"].items()):
+        if isinstance(val, dict):
+            val.setdefault("subjects", {})
+            val.setdefault("info", {})
+        else:
+            data["students"][s] = {"info": {}, "subjects": {}}
+    return data, False
+
+
+def save_data(data, path=DATA_FILE, legacy=False):
+    """Writes to a temp file and renames it, so a crash never leaves half a file."""
+    if legacy and list(data["students"]) == [DEFAULT_STUDENT]:
+        data = dict(data)
+        data["subjects"] = data.pop("students")[DEFAULT_STUDENT]["subjects"]
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp, path)
+
+
+def status_text(attended, total, goal_percent):
+    """Same status wording as the GUI subject cards."""
+    if total == 0:
+        return "No classes held yet."
+    goal = goal_percent / 100.0
+    perc = (attended / total) * 100.0
+    if perc >= goal_percent:
+        can_miss = max(0, int((attended / goal) - total))
+        return f"Safe. You can miss {can_miss} class(es)."
+    if goal >= 1:
+        # a 100% goal can never be reached again once a class was missed
+        return "Danger! Cannot reach the goal any more."
+    needed = max(0, -(-((goal * total) - attended) // (1 - goal)))
+    return f"Danger! Attend next {int(needed)} class(es)."
+
+
+# ---------------- Commands ----------------
+def _student(data, name):
+    if name is None:
+        name = next(iter(data["students"]), None)
+    if name not in data["students"]:
+        raise CLIError(f"Unknown student '{name}'.")
+    return name, data["students"][name]
+
+
+def _subject(data, student, subject):
+    student, st = _student(data, student)
+    if subject not in st["subjects"]:
+        raise CLIError(f"Unknown subject '{subject}' for student '{student}'.")
+    return student, st["subjects"][subject]
+
+
+def cmd_mark(data, args, out):
+    student, info = _subject(data, args.student, args.subject)
+    attended = 1 if args.status == "attended" else 0
+    # a class generated from the timetable is already counted; just settle it
+    try:
+        if timetable.confirm(data, student, args.subject, attended=bool(attended)):
+            return True
+    except timetable.TimetableError as e:
+        raise CLIError(str(e))
+    info["attended"] = info.get("attended", 0) + attended
+    info["total"] = info.get("total", 0) + 1
+    attendance_sync.record(data, "count", student=student, subject=args.subject, attended=attended, total=1)
+    return True
+
+
+def cmd_edit(data, args, out):
+    student, info = _subject(data, args.student, args.subject)
+    if args.attended < 0 or args.total < 0 or args.attended > args.total:
+        raise CLIError("Please enter logical numbers (0 <= attended <= total).")
+    before = [info.get("attended", 0), info.get("total", 0)]
+    info["attended"] = args.attended
+    info["total"] = args.total
+    timetable.trim_pending(info)
+    attendance_sync.record(data, "edit", student=student, subject=args.subject,
+                           attended=args.attended, total=args.total, before=before)
+    return True
+
+
+def cmd_add_student(data, args, out):
+    if args.legacy:
+        raise CLIError("This data file is in tracker_app.py's single-student format. "
+                       "Open it once in attendance_tracker_updated.py to convert it before adding students.")
+    name = args.name.strip()
+    if not name:
+        raise CLIError("Student name cannot be empty.")
+    if name in data["students"]:
+        raise CLIError("A student with this name already exists.")
+    data["students"][name] = {"info": {"class": args.class_name.strip(), "roll": args.roll.strip()},
+                              "subjects": {}}
+    attendance_sync.record(data, "add-student", student=name, info=data["students"][name]["info"])
+    return True
+
+
+def cmd_add_subject(data, args, out):
+    name = args.name.strip()
+    if not name:
+        raise CLIError("Subject name cannot be empty.")
+    student, st = _student(data, args.student)
+    if name in st["subjects"]:
+        raise CLIError(f"Subject already exists for student '{student}'.")
+    st["subjects"][name] = {"attended": 0, "total": 0}
+    attendance_sync.record(data, "add-subject", student=student, subject=name)
+    return True
+
+
+def cmd_set_goal(data, args, out):
+    if not 1.0 <= args.goal <= 100.0:
+        raise CLIError("Goal must be between 1 and 100.")
+    data["settings"]["goal"] = args.goal
+    attendance_sync.record(data, "set-goal", goal=args.goal)
+    return True
+
+
+def write_summary(data, names, out):
+    goal = data["settings"].get("goal", 75.0)
+    for name in names:
+        name, st = _student(data, name)
+        overall_att = overall_total = 0
+        out.write(f"Student: {name}\n")
+        for subj in sorted(st["subjects"], key=str.lower):
+            info = st["subjects"][subj]
+            a, t = info.get("attended", 0), info.get("total", 0)
+            overall_att += a
+            overall_total += t
+            perc = 100.0 if t == 0 else (a / t) * 100.0
+            pending = f"  [{len(info['pending'])} pending]" if info.get("pending") else ""
+            out.write(f"  {subj}: {a}/{t} ({perc:.2f}%)  {status_text(a, t, goal)}{pending}\n")
+        overall = 100.0 if overall_total == 0 else (overall_att / overall_total) * 100.0
+        out.write(f"  Overall: {overall_att}/{overall_total} ({overall:.2f}%)  Goal: {goal:.0f}%\n")
+
+
+def cmd_summary(data, args, out):
+    out.write(f"Term: {term_archive.current_term(data)}\n")
+    write_summary(data, [args.student] if args.student else list(data["students"]), out)
+    return False
+
+
+def cmd_close_term(data, args, out):
+    try:
+        if attendance_sync.is_enabled(data) and attendance_sync.unseen_batches(data):
+            raise CLIError("Other machines have changes for this term that were not synced yet; run 'sync' first.")
+        closed = term_archive.close_term(data, args.data, args.new_term)
+    except (term_archive.ArchiveError, attendance_sync.SyncError) as e:
+        raise CLIError(str(e))
+    # every other machine archives the same term when it applies this
+    attendance_sync.record(data, "close-term", term=closed, new_term=args.new_term.strip())
+    out.write(f"Archived '{closed}'. Active term is now '{args.new_term.strip()}'.\n")
+    return True
+
+
+def cmd_archives(data, args, out):
+    """Lists archived terms from the index only; no archive is decompressed."""
+    for term, entry in term_archive.load_index(args.data)["terms"].items():
+        att = sum(s["attended"] for s in entry["students"].values())
+        tot = sum(s["total"] for s in entry["students"].values())
+        out.write(f"{term}  (closed {entry['closed']})  students: {len(entry['students'])}  "
+                  f"classes: {att}/{tot}\n")
+    return False
+
+
+def cmd_archive_summary(data, args, out):
+    try:
+        archived = term_archive.load_term(args.data, args.term)
+    except term_archive.ArchiveError as e:
+        raise CLIError(str(e))
+    out.write(f"Term: {archived['term']} (archived)\n")
+    write_summary(archived, [args.student] if args.student else list(archived["students"]), out)
+    return False
+
+
+def cmd_sync_init(data, args, out):
+    if args.legacy:
+        # other machines' students would turn this file into the multi-student format
+        raise CLIError("This data file is in tracker_app.py's single-student format. "
+                       "Open it once in attendance_tracker_updated.py to convert it before enabling sync.")
+    if not os.path.isdir(args.drop):
+        raise CLIError(f"Drop directory '{args.drop}' does not exist.")
+    state = attendance_sync.init_sync(data, args.drop, args.node)
+    out.write(f"Sync enabled as node '{state['node']}' using '{state['drop']}'.\n")
+    return True
+
+
+def cmd_sync(data, args, out):
+    try:
+        sent, received, conflicts = attendance_sync.sync(data, args.data, args.drop)
+    except attendance_sync.SyncError as e:
+        raise CLIError(str(e))
+    out.write(f"Sent {sent} change(s), received {received} change(s).\n")
+    for c in conflicts:
+        out.write(f"  conflict: {c['message']}\n")
+    return True
+
+
+def cmd_sync_conflicts(data, args, out):
+    if not attendance_sync.is_enabled(data):
+        raise CLIError("Sync is not set up for this data file.")
+    for c in data["sync"]["conflicts"]:
+        out.write(f"{c['message']}\n")
+    if args.clear:
+        attendance_sync.clear_conflicts(data)
+        return True
+    return False
+
+
+def _date(text):
+    try:
+        return timetable.parse_date(text) if text else datetime.date.today()
+    except timetable.TimetableError as e:
+        raise CLIError(str(e))
+
+
+def cmd_set_slots(data, args, out):
+    if args.days and not any(args.subject in st["subjects"] for st in data["students"].values()):
+        raise CLIError(f"No student has a subject named '{args.subject}'.")
+    try:
+        days = [timetable.parse_weekday(d) for d in args.days]
+    except timetable.TimetableError as e:
+        raise CLIError(str(e))
+    timetable.set_slots(data, args.subject, days)
+    return True
+
+
+def cmd_add_holiday(data, args, out):
+    timetable.add_holiday(data, _date(args.date))
+    return True
+
+
+def cmd_set_term_end(data, args, out):
+    timetable.set_term_end(data, _date(args.date))
+    return True
+
+
+def cmd_generate(data, args, out):
+    start = _date(args.date)
+    end = _date(args.until) if args.until else start
+    try:
+        created = timetable.generate(data, start, end)
+    except timetable.TimetableError as e:
+        raise CLIError(str(e))
+    out.write(f"Created {created} pending class(es) from {start.isoformat()} to {end.isoformat()}.\n")
+    return True
+
+
+def cmd_confirm(data, args, out):
+    student = _subject(data, args.student, args.subject)[0]
+    try:
+        done = timetable.confirm(data, student, args.subject, attended=args.status == "attended",
+                                 day=_date(args.date) if args.date else None)
+    except timetable.TimetableError as e:
+        raise CLIError(str(e))
+    if not done:
+        raise CLIError(f"No pending {args.subject} class for student '{student}'.")
+    return True
+
+
+def cmd_project(data, args, out):
+    student = _subject(data, args.student, args.subject)[0]
+    goal = data["settings"].get("goal", 75.0)
+    try:
+        p = timetable.project(data, student, args.subject, goal, _date(args.date))
+    except timetable.TimetableError as e:
+        raise CLIError(str(e))
+    out.write(f"{args.subject} ({student}), goal {goal:.0f}%:\n")
+    if p["remaining"] is not None:
+        out.write(f"  {p['remaining']} class(es) left this term, {p['can_miss']} can be missed.\n")
+    if not p["below"]:
+        if p["falls_below"]:
+            out.write(f"  Missing every class, it falls below the goal on {p['falls_below'].isoformat()}.\n")
+        else:
+            out.write("  Missing every class, it won't fall below the goal this term.\n")
+    elif p["recovers"]:
+        out.write(f"  Attending every class, it reaches the goal on {p['recovers'].isoformat()}.\n")
+    else:
+        out.write("  The goal cannot be reached again this term.\n")
+    return False
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="attendance_cli.py", description="Headless attendance tracker.")
+    parser.add_argument("--data", default=DATA_FILE, help="path to the JSON data file")
+    parser.add_argument("--student", default=None, help="student to act on (default: first student)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("mark", help="record one class for a subject")
+    p.add_argument("subject")
+    p.add_argument("status", choices=("attended", "missed"))
+    p.set_defaults(func=cmd_mark)
+
+    p = sub.add_parser("edit", help="overwrite attended/total for a subject")
+    p.add_argument("subject")
+    p.add_argument("attended", type=int)
+    p.add_argument("total", type=int)
+    p.set_defaults(func=cmd_edit)
+
+    p = sub.add_parser("add-student", help="create a new student")
+    p.add_argument("name")
+    p.add_argument("--class", dest="class_name", default="")
+    p.add_argument("--roll", default="")
+    p.set_defaults(func=cmd_add_student)
+
+    p = sub.add_parser("add-subject", help="add a subject to a student")
+    p.add_argument("name")
+    p.set_defaults(func=cmd_add_subject)
+
+    p = sub.add_parser("set-goal", help="set the attendance goal (%%)")
+    p.add_argument("goal", type=float)
+    p.set_defaults(func=cmd_set_goal)
+
+    p = sub.add_parser("summary", help="print attendance for one or all students")
+    p.set_defaults(func=cmd_summary)
+
+    p = sub.add_parser("close-term", help="archive the active term and start a new one")
+    p.add_argument("new_term")
+    p.set_defaults(func=cmd_close_term)
+
+    p = sub.add_parser("archives", help="list archived terms")
+    p.set_defaults(func=cmd_archives)
+
+    p = sub.add_parser("archive-summary", help="print attendance for an archived term")
+    p.add_argument("term")
+    p.set_defaults(func=cmd_archive_summary)
+
+    p = sub.add_parser("sync-init", help="enable delta sync through a shared drop directory")
+    p.add_argument("drop")
+    p.add_argument("--node", default=None, help="name of this machine (default: hostname + random suffix)")
+    p.set_defaults(func=cmd_sync_init)
+
+    p = sub.add_parser("sync", help="exchange changes with other machines")
+    p.add_argument("drop", nargs="?", default=None)
+    p.set_defaults(func=cmd_sync)
+
+    p = sub.add_parser("sync-conflicts", help="list merge conflicts logged by sync")
+    p.add_argument("--clear", action="store_true", help="forget them after listing")
+    p.set_defaults(func=cmd_sync_conflicts)
+
+    p = sub.add_parser("set-slots", help="set the weekly slots of a subject (e.g. mon wed wed)")
+    p.add_argument("subject")
+    p.add_argument("days", nargs="*")
+    p.set_defaults(func=cmd_set_slots)
+
+    p = sub.add_parser("add-holiday", help="mark a date (YYYY-MM-DD) as a holiday")
+    p.add_argument("date")
+    p.set_defaults(func=cmd_add_holiday)
+
+    p = sub.add_parser("set-term-end", help="last day of the term (YYYY-MM-DD)")
+    p.add_argument("date")
+    p.set_defaults(func=cmd_set_term_end)
+
+    p = sub.add_parser("generate", help="create the timetabled classes for a day (default: today)")
+    p.add_argument("--date", default=None)
+    p.add_argument("--until", default=None, help="generate every day from --date up to this date")
+    p.set_defaults(func=cmd_generate)
+
+    p = sub.add_parser("confirm", help="settle a pending generated class")
+    p.add_argument("subject")
+    p.add_argument("status", choices=("attended", "missed"))
+    p.add_argument("--date", default=None, help="which pending class (default: the oldest)")
+    p.set_defaults(func=cmd_confirm)
+
+    p = sub.add_parser("project", help="project a subject against the goal using the timetable")
+    p.add_argument("subject")
+    p.add_argument("--date", default=None, help="project from this date (default: today)")
+    p.set_defaults(func=cmd_project)
+
+    sub.add_parser("batch", help="read commands from stdin, one per line, and save once")
+    return parser
+
+
+def _parse_line(parser, line, defaults):
+    """Parses one batch line; --data/--student from the outer call act as defaults."""
+    argv = shlex.split(line, comments=True)
+    if not argv:
+        return None
+    args = parser.parse_args(["--data", defaults.data] + argv)
+    if args.command == "batch":
+        raise CLIError("'batch' cannot be nested.")
+    if args.command in ("close-term", "sync", "sync-init"):
+        # these write files outside the data file, so they cannot be rolled back with the batch
+        raise CLIError(f"'{args.command}' cannot be used inside a batch.")
+    if args.student is None:
+        args.student = defaults.student
+    args.legacy = defaults.legacy
+    return args
+
+
+def run(argv=None, stdin=None, out=None):
+    """Entry point; returns a process exit code."""
+    stdin = stdin or sys.stdin
+    out = out or sys.stdout
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        data, args.legacy = load_data(args.data)
+        if args.command == "batch":
+            commands = []
+            for lineno, line in enumerate(stdin, 1):
+                try:
+                    parsed = _parse_line(parser, line, args)
+                except SystemExit:
+                    raise CLIError(f"line {lineno}: could not parse {line.strip()!r}")
+                if parsed is not None:
+                    commands.append((lineno, parsed))
+            changed = False
+            for lineno, cmd in commands:
+                try:
+                    changed = cmd.func(data, cmd, out) or changed
+                except CLIError as e:
+                    raise CLIError(f"line {lineno}: {e}")
+        else:
+            changed = args.func(data, args, out)
+    except CLIError as e:
+        # nothing is written when any command fails, so a batch is all-or-nothing
+        sys.stderr.write(f"error: {e}\n")
+        return 1
+    if changed:
+        save_data(data, args.data, args.legacy)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
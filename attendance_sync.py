@@ -0,0 +1,265 @@
+# attendance_sync.py
+"""
+Delta sync between machines that share a drop directory (network share,
+USB stick, synced folder, ...).
+
+Every change made through the CLI or the student app is recorded as a small
+operation in data["sync"]["pending"]. sync() writes the pending operations to
+the drop directory as one numbered file per machine and batch, then applies
+the files of the other machines it has not seen yet. Only changes travel, so
+the cost of a sync depends on how much changed, not on how big the data is.
+Every operation is numbered when it is recorded, and that number is saved with
+the change itself. Batch files are named after their last operation, and
+readers skip operations they already applied, so a batch written again after a
+crash (before the data file was saved) cannot lose or repeat anything.
+
+Each machine also leaves a <node>.seen file, from sync-init on. Once every
+registered machine has seen a batch, the machine that wrote it deletes it, so
+the drop directory stays small. A machine that needs batches that are already
+deleted gets a SyncError asking for a full copy instead of silently diverging.
+
+Merging is deterministic:
+  * marks are applied as +attended/+total deltas, so order never matters;
+  * edits are applied as the delta the editing machine made (new - before),
+    so an edit and a concurrent mark on another machine both survive. When
+    the local values no longer match what the editor saw, the merge is
+    recorded in data["sync"]["conflicts"] for a human to review;
+  * a subject deleted on one machine comes back if another machine marked
+    it before syncing, so no marks are lost;
+  * the goal is last-writer-wins on a Lamport timestamp (clock, node);
+  * closing a term travels as an operation, so every machine archives it;
+    changes another machine made in a term that is already closed here are
+    not applied but reported (and logged as conflicts).
+
+Only changes are exchanged: machines must start from copies of the same data
+file before sync-init, otherwise their starting data is never reconciled.
+
+Sync state kept in the data file:
+    "sync": {"node": ..., "drop": ..., "clock": 0,
+             "seq": 0,                  # number of the last operation recorded here
+             "seen": {node: seq},       # last operation applied from each machine
+             "pruned": 0,               # our batches up to this number are deleted
+             "pending": [...], "conflicts": [...]}
+"""
+import json
+import os
+import socket
+import uuid
+
+import term_archive
+
+DEFAULT_TERM = "Current Term"
+MAX_CONFLICTS = 100  # only the latest ones are kept in the data file
+
+
+class SyncError(Exception):
+    """Raised when sync is not set up or the drop directory is unusable."""
+
+
+def is_enabled(data):
+    return "sync" in data
+
+
+def init_sync(data, drop_dir, node=None):
+    """
+    Turns sync on for this data file and registers this machine in the drop
+    directory, so other machines keep their batches until it has seen them.
+    Existing state (seen, pending) is kept.
+    """
+    state = data.setdefault("sync", {})
+    old = state.get("node")
+    state["node"] = node or old or f"{socket.gethostname()}-{uuid.uuid4().hex[:6]}"
+    if old is not None and old != state["node"]:
+        # a copy of another machine's file: its changes are already in this data,
+        # and its unsent ones will be sent by that machine
+        state["seen"][old] = state["seq"]
+        state["seq"], state["pruned"], state["pending"] = 0, 0, []
+    state["drop"] = os.path.abspath(drop_dir)
+    for key, default in (("clock", 0), ("seq", 0), ("seen", {}), ("pruned", 0), ("pending", []),
+                         ("conflicts", [])):
+        state.setdefault(key, default)
+    _publish_seen(state, _drop(state, None))
+    return state
+
+
+def clear_conflicts(data):
+    data["sync"]["conflicts"] = []
+
+
+def _term(data):
+    return data["settings"].get("term", DEFAULT_TERM)
+
+
+def record(data, op, **fields):
+    """Queues one local change for the next sync. No-op when sync is off."""
+    state = data.get("sync")
+    if state is None:
+        return
+    state["clock"] += 1
+    state["seq"] += 1
+    entry = {"op": op, "n": state["seq"], "term": _term(data), "ts": [state["clock"], state["node"]]}
+    entry.update(fields)
+    state["pending"].append(entry)
+    if op == "set-goal":
+        state["goal_ts"] = entry["ts"]
+
+
+def _subject(data, student, subject):
+    st = data["students"].setdefault(student, {"info": {}, "subjects": {}})
+    return st["subjects"].setdefault(subject, {"attended": 0, "total": 0})
+
+
+def _apply(data, data_file, op, conflicts):
+    """Applies one remote operation to `data`. Returns False if it was skipped."""
+    state = data["sync"]
+    state["clock"] = max(state["clock"], op["ts"][0])
+    term = op.get("term", DEFAULT_TERM)
+    if term != _term(data):
+        conflicts.append({"op": op, "message": f"{op['op']} from {op['ts'][1]} was made in term '{term}', "
+                                               f"but this machine is in '{_term(data)}'; not applied"})
+        return False
+    kind = op["op"]
+    if kind == "add-student":
+        data["students"].setdefault(op["student"], {"info": op.get("info", {}), "subjects": {}})
+    elif kind == "delete-student":
+        data["students"].pop(op["student"], None)
+    elif kind == "add-subject":
+        _subject(data, op["student"], op["subject"])
+    elif kind == "delete-subject":
+        data["students"].get(op["student"], {}).get("subjects", {}).pop(op["subject"], None)
+    elif kind == "count":
+        info = _subject(data, op["student"], op["subject"])
+        info["attended"] = info.get("attended", 0) + op["attended"]
+        info["total"] = info.get("total", 0) + op["total"]
+    elif kind == "edit":
+        info = _subject(data, op["student"], op["subject"])
+        local = [info.get("attended", 0), info.get("total", 0)]
+        before = op["before"]
+        attended = local[0] + op["attended"] - before[0]
+        total = local[1] + op["total"] - before[1]
+        total = max(0, total)
+        attended = min(max(0, attended), total)
+        info["attended"], info["total"] = attended, total
+        if local != before or [attended, total] != [op["attended"], op["total"]]:
+            conflicts.append({"op": op, "local": local, "result": [attended, total],
+                              "message": f"{op['student']} / {op['subject']}: edit from {op['ts'][1]} "
+                                         f"{before} -> {[op['attended'], op['total']]} merged onto "
+                                         f"{local} = {[attended, total]}"})
+    elif kind == "set-goal":
+        if op["ts"] > state.get("goal_ts", [0, ""]):
+            data["settings"]["goal"] = op["goal"]
+            state["goal_ts"] = op["ts"]
+    elif kind == "close-term":
+        try:
+            term_archive.close_term(data, data_file, op["new_term"])
+        except term_archive.ArchiveError as e:
+            conflicts.append({"op": op, "message": f"close-term from {op['ts'][1]} failed here: {e}"})
+            return False
+    return True
+
+
+def _batch_name(node, seq):
+    return f"{node}.{seq:08d}.json"
+
+
+def _publish_seen(state, drop_dir):
+    path = os.path.join(drop_dir, state["node"] + ".seen")
+    with open(path + ".tmp", "w") as f:
+        json.dump({"seen": state["seen"], "pruned": state["pruned"]}, f)
+    os.replace(path + ".tmp", path)
+
+
+def _scan(state, drop_dir):
+    """
+    Lists the drop directory once. Returns (unseen, own, seen_by):
+    unseen batches of other nodes as (node, last, name), this node's own
+    batches as (last, name), and every other node's published .seen file.
+    """
+    unseen, own, seen_by = [], [], {}
+    for name in os.listdir(drop_dir):
+        if name.endswith(".seen"):
+            node = name[:-len(".seen")]
+            if node != state["node"]:
+                with open(os.path.join(drop_dir, name), "r") as f:
+                    seen_by[node] = json.load(f)
+            continue
+        if not name.endswith(".json"):
+            continue
+        node, _, seq = name[:-len(".json")].rpartition(".")
+        if not node or not seq.isdigit():
+            continue
+        if node == state["node"]:
+            own.append((int(seq), name))
+        elif int(seq) > state["seen"].get(node, 0):
+            unseen.append((node, int(seq), name))
+    return unseen, own, seen_by
+
+
+def _drop(state, drop_dir):
+    drop_dir = drop_dir or state.get("drop")
+    if not drop_dir or not os.path.isdir(drop_dir):
+        raise SyncError(f"Drop directory '{drop_dir}' does not exist.")
+    return drop_dir
+
+
+def unseen_batches(data, drop_dir=None):
+    """Number of other machines' batches waiting in the drop directory."""
+    state = data["sync"]
+    return len(_scan(state, _drop(state, drop_dir))[0])
+
+
+def sync(data, data_file, drop_dir=None):
+    """
+    Publishes pending local operations and applies unseen remote ones.
+    Returns (sent, received, new_conflicts); operations that were not applied
+    (see _apply) are in new_conflicts, not in received. The caller saves `data`.
+    """
+    state = data.get("sync")
+    if state is None:
+        raise SyncError("Sync is not set up for this data file.")
+    drop_dir = _drop(state, drop_dir)
+
+    # file names carry node and last op number, so unseen batches are found without opening any file
+    unseen, own, seen_by = _scan(state, drop_dir)
+    for node, published in seen_by.items():
+        if published.get("pruned", 0) > state["seen"].get(node, 0):
+            raise SyncError(f"'{node}' already deleted changes this machine never applied. Copy the data "
+                            f"file of an up-to-date machine and run sync-init on it with a new node name.")
+
+    sent = len(state["pending"])
+    if sent:
+        # pending ops keep their numbers until the data file is saved, so a
+        # re-send after a crash overlaps this file instead of reusing its name
+        last = state["pending"][-1]["n"]
+        path = os.path.join(drop_dir, _batch_name(state["node"], last))
+        with open(path + ".tmp", "w") as f:
+            json.dump({"node": state["node"], "ops": state["pending"]}, f)
+        os.replace(path + ".tmp", path)
+        state["pending"] = []
+
+    received = 0
+    conflicts = []
+    for node, last, name in sorted(unseen):
+        seen = state["seen"].get(node, 0)
+        if last <= seen:
+            continue  # covered by an overlapping batch applied just before
+        with open(os.path.join(drop_dir, name), "r") as f:
+            ops = json.load(f)["ops"]
+        if ops[0]["n"] > seen + 1:
+            # an earlier batch from this node has not arrived yet; wait for it
+            continue
+        for op in ops:
+            if op["n"] > seen:
+                received += _apply(data, data_file, op, conflicts)
+        state["seen"][node] = last
+    state["conflicts"] = (state["conflicts"] + conflicts)[-MAX_CONFLICTS:]
+
+    # drop our batches that every registered machine has already applied
+    if seen_by:
+        everyone = min(published["seen"].get(state["node"], 0) for published in seen_by.values())
+        for last, name in own:
+            if last <= everyone:
+                os.remove(os.path.join(drop_dir, name))
+                state["pruned"] = max(state["pruned"], last)
+    _publish_seen(state, drop_dir)
+    return sent, received, conflicts
@@ -1,11 +1,16 @@
 # attendance_custom_students.py
+import datetime
 import json
 import os
 import tkinter as tk
-from tkinter import messagebox, simpledialog
+from tkinter import filedialog, messagebox, simpledialog
 
 import customtkinter as ctk
 
+import attendance_sync
+import term_archive
+import timetable
+
 # ---------------- CONFIG ----------------
 DATA_FILE = "attendance_pro_data.json"
 APP_TITLE = "Pro Attendance Tracker (Students)"
@@ -131,6 +136,12 @@ class AttendanceApp:
                       fg_color=PEACH, hover_color="#FFCBA8").pack(side="left", padx=6, pady=8)
         ctk.CTkButton(header_right, text="Reset All", width=90, command=self.reset_all_data,
                       fg_color="#BF616A", hover_color="#d26b75").pack(side="left", padx=6, pady=8)
+        ctk.CTkButton(header_right, text="Close Term", width=100, command=self.close_term,
+                      fg_color=PEACH, hover_color="#FFCBA8").pack(side="left", padx=6, pady=8)
+        ctk.CTkButton(header_right, text="Sync", width=70, command=self.sync_now,
+                      fg_color=PEACH, hover_color="#FFCBA8").pack(side="left", padx=6, pady=8)
+        ctk.CTkButton(header_right, text="Past Terms", width=100, command=self.show_past_terms,
+                      fg_color=PEACH, hover_color="#FFCBA8").pack(side="left", padx=6, pady=8)
 
         # Main area card
         main = ctk.CTkFrame(self.root, corner_radius=12, fg_color=CARD_BG)
@@ -170,6 +181,8 @@ class AttendanceApp:
                       command=self.mark_missed).pack(side="left", padx=12, pady=8, expand=True)
         ctk.CTkButton(action_row, text="Edit Selected", fg_color=PEACH, hover_color="#FFCBA8",
                       command=self.open_edit_window).pack(side="left", padx=12, pady=8, expand=True)
+        ctk.CTkButton(action_row, text="Generate Today", fg_color=PEACH, hover_color="#FFCBA8",
+                      command=self.generate_today).pack(side="left", padx=12, pady=8, expand=True)
 
         # Summary footer
         footer = ctk.CTkFrame(self.root, corner_radius=0, fg_color=BG_DARK)
@@ -219,6 +232,7 @@ class AttendanceApp:
             # create student structure
             self.data["students"][name] = {"info": {"class": ent_class.get().strip(), "roll": ent_roll.get().strip()},
                                           "subjects": {}}
+            attendance_sync.record(self.data, "add-student", student=name, info=self.data["students"][name]["info"])
             save_data(self.data)
             # refresh student menu
             vals = list(self.data["students"].keys())
@@ -241,6 +255,7 @@ class AttendanceApp:
             return
         if messagebox.askyesno("Confirm Delete", f"Delete student '{self.current_student}' and all their data?"):
             del self.data["students"][self.current_student]
+            attendance_sync.record(self.data, "delete-student", student=self.current_student)
             save_data(self.data)
             # pick another student (first)
             remaining = list(self.data["students"].keys())
@@ -307,6 +322,8 @@ class AttendanceApp:
                     import math
                     needed = max(0, math.ceil(((goal * total) - attended) / (1 - goal)))
                     status = f"⚠️ Danger! Attend next {needed} class(es)."
+            if info.get("pending"):
+                status += f"   ⏳ {len(info['pending'])} pending"
 
             card = ctk.CTkFrame(self.scrollable, fg_color="#222325", corner_radius=10, height=84)
             card.pack(fill="x", padx=10, pady=8)
@@ -356,6 +373,7 @@ class AttendanceApp:
             messagebox.showinfo("Exists", "Subject already exists for this student.")
             return
         subjects[name] = {"attended": 0, "total": 0}
+        attendance_sync.record(self.data, "add-subject", student=self.current_student, subject=name)
         save_data(self.data)
         self.entry_subject.delete(0, tk.END)
         self.render_subject_cards()
@@ -368,6 +386,8 @@ class AttendanceApp:
         subjects = self.get_current_subjects()
         if messagebox.askyesno("Confirm Delete", f"Delete '{self.selected_subject}' for student '{self.current_student}'?"):
             del subjects[self.selected_subject]
+            attendance_sync.record(self.data, "delete-subject", student=self.current_student,
+                                   subject=self.selected_subject)
             save_data(self.data)
             self.selected_subject = None
             self.render_subject_cards()
@@ -377,13 +397,7 @@ class AttendanceApp:
         if not self.selected_subject:
             messagebox.showwarning("Select", "Please select a subject (click a card) first.")
             return
-        subjects = self.get_current_subjects()
-        s = self.selected_subject
-        subjects[s]["attended"] = subjects[s].get("attended", 0) + 1
-        subjects[s]["total"] = subjects[s].get("total", 0) + 1
-        save_data(self.data)
-        self.render_subject_cards()
-        self.update_summary()
+        self._quick_attend(self.selected_subject)
 
     def mark_missed(self):
         if not self.selected_subject:
@@ -391,7 +405,9 @@ class AttendanceApp:
             return
         subjects = self.get_current_subjects()
         s = self.selected_subject
-        subjects[s]["total"] = subjects[s].get("total", 0) + 1
+        if not timetable.confirm(self.data, self.current_student, s, attended=False):
+            subjects[s]["total"] = subjects[s].get("total", 0) + 1
+            attendance_sync.record(self.data, "count", student=self.current_student, subject=s, attended=0, total=1)
         save_data(self.data)
         self.render_subject_cards()
         self.update_summary()
@@ -431,8 +447,12 @@ class AttendanceApp:
                 if a < 0 or t < 0 or a > t:
                     messagebox.showerror("Invalid", "Please enter logical numbers (0 <= attended <= total).", parent=edit)
                     return
+                before = [info.get("attended", 0), info.get("total", 0)]
                 subjects[subj]["attended"] = a
                 subjects[subj]["total"] = t
+                timetable.trim_pending(subjects[subj])
+                attendance_sync.record(self.data, "edit", student=self.current_student, subject=subj,
+                                       attended=a, total=t, before=before)
                 save_data(self.data)
                 edit.destroy()
                 self.render_subject_cards()
@@ -445,15 +465,25 @@ class AttendanceApp:
     # quick per-card actions used by the small ✓ / ✗ buttons
     def _quick_attend(self, subj):
         subjects = self.get_current_subjects()
-        subjects[subj]["attended"] = subjects[subj].get("attended", 0) + 1
-        subjects[subj]["total"] = subjects[subj].get("total", 0) + 1
+        # a class generated from the timetable is already counted; just settle it
+        try:
+            confirmed = timetable.confirm(self.data, self.current_student, subj, attended=True)
+        except timetable.TimetableError as e:
+            messagebox.showwarning("Timetable", str(e))
+            return
+        if not confirmed:
+            subjects[subj]["attended"] = subjects[subj].get("attended", 0) + 1
+            subjects[subj]["total"] = subjects[subj].get("total", 0) + 1
+            attendance_sync.record(self.data, "count", student=self.current_student, subject=subj, attended=1, total=1)
         save_data(self.data)
         self.render_subject_cards()
         self.update_summary()
 
     def _quick_miss(self, subj):
         subjects = self.get_current_subjects()
-        subjects[subj]["total"] = subjects[subj].get("total", 0) + 1
+        if not timetable.confirm(self.data, self.current_student, subj, attended=False):
+            subjects[subj]["total"] = subjects[subj].get("total", 0) + 1
+            attendance_sync.record(self.data, "count", student=self.current_student, subject=subj, attended=0, total=1)
         save_data(self.data)
         self.render_subject_cards()
         self.update_summary()
@@ -466,6 +496,7 @@ class AttendanceApp:
         if new_goal is not None:
             self.goal_percent.set(new_goal)
             self.data["settings"]["goal"] = new_goal
+            attendance_sync.record(self.data, "set-goal", goal=new_goal)
             save_data(self.data)
             self.goal_label.configure(text=f"Goal: {self.goal_percent.get():.0f}%")
             self.render_subject_cards()
@@ -473,7 +504,16 @@ class AttendanceApp:
 
     def reset_all_data(self):
         if messagebox.askyesno("Confirm Reset", "Are you sure you want to delete ALL students and their data? This cannot be undone."):
+            sync_state = self.data.get("sync")
+            term = self.data["settings"].get("term")
             self.data = {"students": {"Default Student": {"info": {}, "subjects": {}}}, "settings": {"goal": 75.0}}
+            if term is not None:
+                # the term name must survive, or it may clash with an archived one on Close Term
+                self.data["settings"]["term"] = term
+            if sync_state is not None:
+                # a reset is local only; keep this machine's sync identity so it can still sync
+                sync_state["pending"] = []
+                self.data["sync"] = sync_state
             save_data(self.data)
             # refresh student menu
             vals = list(self.data["students"].keys())
@@ -484,6 +524,122 @@ class AttendanceApp:
             self.render_subject_cards()
             self.update_summary()
 
+    # -------------------- Timetable --------------------
+    def generate_today(self):
+        """Creates today's timetabled classes (as pending) for every student."""
+        tt = timetable.get_timetable(self.data)
+        if not tt["slots"]:
+            messagebox.showinfo("Timetable", "No timetable yet. Set slots with:\n"
+                                             "python attendance_cli.py set-slots \"Subject\" mon wed")
+            return
+        try:
+            created = timetable.generate(self.data, datetime.date.today())
+        except timetable.TimetableError as e:
+            messagebox.showwarning("Timetable", str(e))
+            return
+        save_data(self.data)
+        self.render_subject_cards()
+        self.update_summary()
+        messagebox.showinfo("Timetable", f"Created {created} pending class(es). "
+                                         "Mark them Attended or Missed to confirm.")
+
+    # -------------------- Sync --------------------
+    def sync_now(self):
+        if not attendance_sync.is_enabled(self.data):
+            drop = filedialog.askdirectory(parent=self.root, title="Choose the shared sync folder")
+            if not drop:
+                return
+            attendance_sync.init_sync(self.data, drop)
+        try:
+            sent, received, conflicts = attendance_sync.sync(self.data, DATA_FILE)
+        except attendance_sync.SyncError as e:
+            messagebox.showerror("Sync", str(e))
+            return
+        save_data(self.data)
+        # a remote set-goal may have changed the goal
+        self.goal_percent.set(self.data["settings"].get("goal", 75.0))
+        self.goal_label.configure(text=f"Goal: {self.goal_percent.get():.0f}%")
+        if not self.data["students"]:
+            self.data["students"]["Default Student"] = {"info": {}, "subjects": {}}
+        students = list(self.data["students"].keys())
+        if self.current_student not in self.data["students"]:
+            self.current_student = students[0]
+        if self.selected_subject not in self.get_current_subjects():
+            self.selected_subject = None
+        self.student_menu.configure(values=students)
+        self.student_var.set(self.current_student)
+        self.render_subject_cards()
+        self.update_summary()
+        msg = f"Sent {sent} change(s), received {received} change(s)."
+        if conflicts:
+            msg += "\n\nNeeds a look:\n" + "\n".join(c["message"] for c in conflicts)
+            attendance_sync.clear_conflicts(self.data)
+            save_data(self.data)
+        messagebox.showinfo("Sync", msg)
+
+    # -------------------- Terms --------------------
+    def close_term(self):
+        new_term = simpledialog.askstring("Close Term",
+                                          f"Archive '{term_archive.current_term(self.data)}' and start a new term.\n"
+                                          "New term name:", parent=self.root)
+        if not new_term:
+            return
+        try:
+            if attendance_sync.is_enabled(self.data) and attendance_sync.unseen_batches(self.data):
+                messagebox.showerror("Close Term", "Other machines have changes for this term that were "
+                                                   "not synced yet. Press Sync first.")
+                return
+            closed = term_archive.close_term(self.data, DATA_FILE, new_term)
+        except (term_archive.ArchiveError, attendance_sync.SyncError) as e:
+            messagebox.showerror("Close Term", str(e))
+            return
+        # every other machine archives the same term when it applies this
+        attendance_sync.record(self.data, "close-term", term=closed, new_term=new_term.strip())
+        save_data(self.data)
+        messagebox.showinfo("Close Term", f"'{closed}' was archived. Subjects now start empty.")
+        self.selected_subject = None
+        self.render_subject_cards()
+        self.update_summary()
+
+    def show_past_terms(self):
+        # only the small index is read here; an archive is opened when a term is picked
+        terms = term_archive.load_index(DATA_FILE)["terms"]
+        if not terms:
+            messagebox.showinfo("Past Terms", "No terms have been archived yet.")
+            return
+
+        popup = tk.Toplevel(self.root)
+        popup.title("Past Terms")
+        popup.geometry("520x420")
+        popup.configure(bg=BG_DARK)
+
+        term_list = tk.Listbox(popup, height=6, bg=CARD_BG, fg=TEXT_COLOR, selectbackground=PEACH)
+        term_list.pack(fill="x", padx=12, pady=(12, 6))
+        names = list(terms.keys())
+        for name in names:
+            term_list.insert(tk.END, f"{name}  (closed {terms[name]['closed']})")
+
+        details = tk.Text(popup, bg=CARD_BG, fg=TEXT_COLOR, font=FONT)
+        details.pack(fill="both", expand=True, padx=12, pady=(6, 12))
+
+        def on_pick(event=None):
+            sel = term_list.curselection()
+            if not sel:
+                return
+            archived = term_archive.load_term(DATA_FILE, names[sel[0]])
+            details.configure(state="normal")
+            details.delete("1.0", tk.END)
+            for student, st in archived["students"].items():
+                details.insert(tk.END, f"{student}\n")
+                for subj in sorted(st["subjects"], key=str.lower):
+                    a = st["subjects"][subj].get("attended", 0)
+                    t = st["subjects"][subj].get("total", 0)
+                    perc = 100.0 if t == 0 else (a / t) * 100.0
+                    details.insert(tk.END, f"    {subj}: {a}/{t} ({perc:.2f}%)\n")
+            details.configure(state="disabled")
+
+        term_list.bind("<<ListboxSelect>>", on_pick)
+
     # -------------------- Summary --------------------
     def update_summary(self):
         subjects = self.get_current_subjects()
@@ -509,7 +665,7 @@ class AttendanceApp:
             info_str += f" Class: {st_info.get('class')}"
         if st_info.get("roll"):
             info_str += f"  Roll: {st_info.get('roll')}"
-        txt = f"Student: {self.current_student}{info_str}    Subjects: {total_sub}    Overall: {overall_att}/{overall_total} ({overall_perc:.2f}%)    At-risk: {danger_count}"
+        txt = f"Term: {term_archive.current_term(self.data)}    Student: {self.current_student}{info_str}    Subjects: {total_sub}    Overall: {overall_att}/{overall_total} ({overall_perc:.2f}%)    At-risk: {danger_count}"
         self.summary_label.configure(text=txt)
 
 
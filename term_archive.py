@@ -0,0 +1,127 @@
+# term_archive.py
+"""
+Cold storage for finished terms.
+
+close_term() moves the active term's subjects out of attendance_pro_data.json
+into a gzip-compressed, read-only archive file, and records a small summary
+for it in an index file. The hot data file then only holds the current term,
+so load/save cost no longer grows semester after semester.
+
+Layout (next to the data file):
+    attendance_archive/
+        index.json              {"terms": {"<term>": {...summary...}}}
+        <term-slug>.json.gz     {"term", "closed", "students", "settings", "timetable"}
+"""
+import datetime
+import gzip
+import json
+import os
+import re
+import stat
+
+ARCHIVE_DIR = "attendance_archive"
+INDEX_FILE = "index.json"
+DEFAULT_TERM = "Current Term"
+
+
+class ArchiveError(Exception):
+    """Raised when a term cannot be archived or an archive cannot be found."""
+
+
+def archive_dir(data_file):
+    return os.path.join(os.path.dirname(os.path.abspath(data_file)), ARCHIVE_DIR)
+
+
+def current_term(data):
+    return data["settings"].get("term", DEFAULT_TERM)
+
+
+def _slug(term):
+    slug = re.sub(r"[^A-Za-z0-9._-]+", "_", term).strip("_")
+    return slug or "term"
+
+
+def load_index(data_file):
+    """Returns {"terms": {...}}; an empty index when nothing was archived yet."""
+    path = os.path.join(archive_dir(data_file), INDEX_FILE)
+    if not os.path.exists(path):
+        return {"terms": {}}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _save_index(data_file, index):
+    path = os.path.join(archive_dir(data_file), INDEX_FILE)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(index, f, indent=4)
+    os.replace(tmp, path)
+
+
+def _term_summary(students):
+    """Per-student attended/total totals, small enough to keep in the index."""
+    summary = {}
+    for name, st in students.items():
+        subjects = st.get("subjects", {})
+        summary[name] = {
+            "subjects": len(subjects),
+            "attended": sum(s.get("attended", 0) for s in subjects.values()),
+            "total": sum(s.get("total", 0) for s in subjects.values()),
+        }
+    return summary
+
+
+def close_term(data, data_file, new_term):
+    """
+    Archives the active term and starts `new_term` in `data` (in place).
+    Students and their info are kept; their subjects start empty.
+    The caller still has to save_data(data) afterwards.
+    """
+    term = current_term(data)
+    new_term = new_term.strip()
+    if not new_term:
+        raise ArchiveError("New term name cannot be empty.")
+    index = load_index(data_file)
+    if new_term == term or new_term in index["terms"]:
+        raise ArchiveError(f"Term '{new_term}' already exists.")
+    if term in index["terms"]:
+        raise ArchiveError(f"Term '{term}' is already archived.")
+
+    folder = archive_dir(data_file)
+    os.makedirs(folder, exist_ok=True)
+    filename = _slug(term) + ".json.gz"
+    n = 1
+    while os.path.exists(os.path.join(folder, filename)):
+        n += 1
+        filename = f"{_slug(term)}-{n}.json.gz"
+    path = os.path.join(folder, filename)
+
+    closed = datetime.date.today().isoformat()
+    payload = {"term": term, "closed": closed,
+               "students": data["students"], "settings": dict(data["settings"])}
+    if "timetable" in data:
+        payload["timetable"] = data["timetable"]
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(payload, f)
+    os.chmod(path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+
+    index["terms"][term] = {"file": filename, "closed": closed,
+                            "students": _term_summary(data["students"])}
+    _save_index(data_file, index)
+
+    # only now shrink the hot data; if anything above failed it is untouched
+    data["students"] = {name: {"info": st.get("info", {}), "subjects": {}}
+                        for name, st in data["students"].items()}
+    # the old term's slots, holidays and term end go with it (see timetable.py)
+    data.pop("timetable", None)
+    data["settings"]["term"] = new_term
+    return term
+
+
+def load_term(data_file, term):
+    """Loads one archived term on demand (same shape as the hot data file)."""
+    entry = load_index(data_file)["terms"].get(term)
+    if entry is None:
+        raise ArchiveError(f"No archived term named '{term}'.")
+    with gzip.open(os.path.join(archive_dir(data_file), entry["file"]), "rt", encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,53 @@
+import io
+import json
+
+import attendance_cli
+
+
+def cli(data_file, *argv, stdin=""):
+    out = io.StringIO()
+    code = attendance_cli.run(["--data", str(data_file)] + list(argv), stdin=io.StringIO(stdin), out=out)
+    return code, out.getvalue()
+
+
+def test_legacy_file_is_written_back_in_the_same_format(tmp_path):
+    data_file = tmp_path / "data.json"
+    data_file.write_text(json.dumps({"subjects": {"Maths": {"attended": 1, "total": 2}}, "settings": {"goal": 75.0}}))
+
+    assert cli(data_file, "mark", "Maths", "attended")[0] == 0
+    saved = json.loads(data_file.read_text())
+    assert "students" not in saved
+    assert saved["subjects"]["Maths"] == {"attended": 2, "total": 3}
+
+    assert cli(data_file, "add-student", "Bob")[0] == 1
+    assert cli(data_file, "sync-init", str(tmp_path))[0] == 1
+    assert json.loads(data_file.read_text()) == saved
+
+
+def test_failed_batch_line_leaves_the_file_untouched(tmp_path):
+    data_file = tmp_path / "data.json"
+    assert cli(data_file, "add-subject", "Maths")[0] == 0
+    before = data_file.read_text()
+
+    code, _ = cli(data_file, "batch", stdin="mark Maths attended\nmark Nope attended\n")
+    assert code == 1
+    assert data_file.read_text() == before
+
+    assert cli(data_file, "batch", stdin="mark Maths attended\n# comment\nmark Maths missed\n")[0] == 0
+    subjects = json.loads(data_file.read_text())["students"]["Default Student"]["subjects"]
+    assert subjects["Maths"] == {"attended": 1, "total": 2}
+
+
+def test_corrupt_file_is_not_overwritten(tmp_path):
+    data_file = tmp_path / "data.json"
+    data_file.write_text("{bad")
+    assert cli(data_file, "set-goal", "80")[0] == 1
+    assert data_file.read_text() == "{bad"
+
+
+def test_summary_with_a_100_percent_goal(tmp_path):
+    data_file = tmp_path / "data.json"
+    cli(data_file, "batch", stdin="add-subject Maths\nmark Maths missed\nset-goal 100\n")
+    code, out = cli(data_file, "summary")
+    assert code == 0
+    assert "Cannot reach the goal" in out
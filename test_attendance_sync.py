@@ -0,0 +1,163 @@
+import copy
+import os
+
+import pytest
+
+import attendance_sync
+import term_archive
+
+
+def make_machine(tmp_path, node, drop, attended=2, total=3):
+    folder = tmp_path / node
+    folder.mkdir()
+    data = {"students": {"S": {"info": {}, "subjects": {"Maths": {"attended": attended, "total": total}}}},
+            "settings": {"goal": 75.0}}
+    attendance_sync.init_sync(data, str(drop), node)
+    return data, str(folder / "attendance_pro_data.json")
+
+
+def maths(data):
+    info = data["students"]["S"]["subjects"]["Maths"]
+    return [info["attended"], info["total"]]
+
+
+def edit(data, attended, total):
+    before = maths(data)
+    data["students"]["S"]["subjects"]["Maths"].update(attended=attended, total=total)
+    attendance_sync.record(data, "edit", student="S", subject="Maths",
+                           attended=attended, total=total, before=before)
+
+
+def mark(data, attended):
+    info = data["students"]["S"]["subjects"]["Maths"]
+    info["attended"] += attended
+    info["total"] += 1
+    attendance_sync.record(data, "count", student="S", subject="Maths", attended=attended, total=1)
+
+
+def sync_all(*machines):
+    # two rounds so every machine sees every other machine's batch
+    for _ in range(2):
+        for data, path in machines:
+            attendance_sync.sync(data, path)
+
+
+def test_edit_racing_a_mark_keeps_both(tmp_path):
+    drop = tmp_path / "drop"
+    drop.mkdir()
+    a, b = make_machine(tmp_path, "A", drop), make_machine(tmp_path, "B", drop)
+    edit(a[0], 5, 6)
+    mark(b[0], 1)
+    sync_all(a, b)
+    assert maths(a[0]) == maths(b[0]) == [6, 7]
+    assert len(a[0]["sync"]["conflicts"]) == 0
+    assert len(b[0]["sync"]["conflicts"]) == 1
+
+
+def test_two_racing_edits_converge_and_are_clamped(tmp_path):
+    drop = tmp_path / "drop"
+    drop.mkdir()
+    a, b = make_machine(tmp_path, "A", drop), make_machine(tmp_path, "B", drop)
+    edit(a[0], 0, 1)
+    edit(b[0], 2, 2)
+    sync_all(a, b)
+    # deltas (-2, -2) and (0, -1) on 2/3 give 0/0 on both sides
+    assert maths(a[0]) == maths(b[0]) == [0, 0]
+    assert a[0]["sync"]["conflicts"] and b[0]["sync"]["conflicts"]
+
+
+def test_close_term_is_synced_and_late_ops_are_reported(tmp_path):
+    drop = tmp_path / "drop"
+    drop.mkdir()
+    a, b = make_machine(tmp_path, "A", drop), make_machine(tmp_path, "B", drop)
+    closed = term_archive.close_term(a[0], a[1], "T2")
+    attendance_sync.record(a[0], "close-term", term=closed, new_term="T2")
+    attendance_sync.sync(*a)
+    mark(b[0], 1)
+    attendance_sync.sync(*b)
+
+    sent, received, conflicts = attendance_sync.sync(*a)
+    assert received == 0
+    assert "not applied" in conflicts[0]["message"]
+
+    assert b[0]["settings"]["term"] == "T2"
+    assert term_archive.load_term(b[1], "Current Term")["students"]["S"]["subjects"]["Maths"]["total"] == 4
+    assert term_archive.load_term(a[1], "Current Term")["students"]["S"]["subjects"]["Maths"]["total"] == 3
+
+
+def test_batches_seen_by_everyone_are_pruned(tmp_path):
+    drop = tmp_path / "drop"
+    drop.mkdir()
+    a, b = make_machine(tmp_path, "A", drop), make_machine(tmp_path, "B", drop)
+    mark(a[0], 1)
+    mark(b[0], 0)
+    sync_all(a, b)
+    assert sorted(os.listdir(drop)) == ["A.seen", "B.seen"]
+    assert maths(a[0]) == maths(b[0]) == [3, 5]
+
+
+def test_drop_path_is_absolute_and_conflicts_are_capped(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "drop").mkdir()
+    data = {"students": {}, "settings": {"goal": 75.0}}
+    state = attendance_sync.init_sync(data, "drop", "A")
+    assert state["drop"] == str(tmp_path / "drop")
+
+    state["conflicts"] = [{"message": str(i)} for i in range(attendance_sync.MAX_CONFLICTS + 10)]
+    attendance_sync.sync(data, str(tmp_path / "data.json"))
+    assert len(state["conflicts"]) == attendance_sync.MAX_CONFLICTS
+    attendance_sync.clear_conflicts(data)
+    assert state["conflicts"] == []
+
+
+def test_late_joiner_is_told_to_take_a_full_copy(tmp_path):
+    drop = tmp_path / "drop"
+    drop.mkdir()
+    a, b = make_machine(tmp_path, "A", drop), make_machine(tmp_path, "B", drop)
+    mark(a[0], 1)
+    sync_all(a, b)
+    assert not [n for n in os.listdir(drop) if n.endswith(".json")]
+
+    c = make_machine(tmp_path, "C", drop)
+    mark(a[0], 1)
+    attendance_sync.sync(*a)
+    with pytest.raises(attendance_sync.SyncError, match="Copy the data file"):
+        attendance_sync.sync(*c)
+
+    # the supported way in: a copy of an up-to-date file under a new node name
+    d_data = copy.deepcopy(b[0])
+    d = (d_data, str(tmp_path / "D.json"))
+    attendance_sync.init_sync(d_data, str(drop), "D")
+    attendance_sync.sync(*d)
+    assert maths(d_data) == [4, 5]
+
+
+def test_registered_machine_keeps_batches_until_it_has_seen_them(tmp_path):
+    drop = tmp_path / "drop"
+    drop.mkdir()
+    a, b = make_machine(tmp_path, "A", drop), make_machine(tmp_path, "B", drop)
+    c = make_machine(tmp_path, "C", drop)
+    mark(a[0], 1)
+    sync_all(a, b)
+    attendance_sync.sync(*c)
+    assert maths(c[0]) == [3, 4]
+
+
+def test_batch_resent_after_an_unsaved_sync_is_not_lost(tmp_path):
+    drop = tmp_path / "drop"
+    drop.mkdir()
+    a, b = make_machine(tmp_path, "A", drop), make_machine(tmp_path, "B", drop)
+    c = make_machine(tmp_path, "C", drop)
+    mark(a[0], 1)
+    saved = copy.deepcopy(a[0])
+    attendance_sync.sync(*a)
+    attendance_sync.sync(*b)
+    assert maths(b[0]) == [3, 4]
+
+    # A crashed before saving: it still has the op pending and records one more
+    a = (saved, a[1])
+    mark(a[0], 0)
+    attendance_sync.sync(*a)
+    attendance_sync.sync(*b)
+    attendance_sync.sync(*c)
+    assert maths(b[0]) == maths(c[0]) == [3, 5]
@@ -0,0 +1,71 @@
+import gzip
+import json
+import os
+import stat
+
+import pytest
+
+import term_archive
+
+
+def make_data(term="Term 1"):
+    return {"students": {"Ann": {"info": {"roll": "7"},
+                                 "subjects": {"Maths": {"attended": 3, "total": 4},
+                                              "Phys": {"attended": 1, "total": 2}}},
+                         "Bob": {"info": {}, "subjects": {}}},
+            "settings": {"goal": 75.0, "term": term}}
+
+
+def test_close_term_writes_a_read_only_gzip_archive(tmp_path):
+    data_file = str(tmp_path / "data.json")
+    data = make_data()
+    assert term_archive.close_term(data, data_file, "Term 2") == "Term 1"
+
+    path = os.path.join(term_archive.archive_dir(data_file), "Term_1.json.gz")
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        payload = json.load(f)
+    assert payload["students"]["Ann"]["subjects"]["Maths"] == {"attended": 3, "total": 4}
+    assert not os.stat(path).st_mode & (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH)
+    assert term_archive.load_term(data_file, "Term 1") == payload
+
+
+def test_index_keeps_per_student_totals(tmp_path):
+    data_file = str(tmp_path / "data.json")
+    term_archive.close_term(make_data(), data_file, "Term 2")
+    entry = term_archive.load_index(data_file)["terms"]["Term 1"]
+    assert entry["students"] == {"Ann": {"subjects": 2, "attended": 4, "total": 6},
+                                 "Bob": {"subjects": 0, "attended": 0, "total": 0}}
+
+
+def test_hot_data_keeps_only_student_info(tmp_path):
+    data = make_data()
+    term_archive.close_term(data, str(tmp_path / "data.json"), "Term 2")
+    assert data["students"] == {"Ann": {"info": {"roll": "7"}, "subjects": {}},
+                                "Bob": {"info": {}, "subjects": {}}}
+    assert data["settings"]["term"] == "Term 2"
+
+
+def test_clashing_file_names_get_a_suffix(tmp_path):
+    data_file = str(tmp_path / "data.json")
+    data = make_data("Term 1")
+    term_archive.close_term(data, data_file, "Term_1")
+    term_archive.close_term(data, data_file, "Term 3")
+    index = term_archive.load_index(data_file)["terms"]
+    assert index["Term 1"]["file"] == "Term_1.json.gz"
+    assert index["Term_1"]["file"] == "Term_1-2.json.gz"
+
+
+def test_existing_and_archived_terms_are_refused(tmp_path):
+    data_file = str(tmp_path / "data.json")
+    data = make_data()
+    term_archive.close_term(data, data_file, "Term 2")
+    with pytest.raises(term_archive.ArchiveError, match="already exists"):
+        term_archive.close_term(data, data_file, "Term 1")
+    with pytest.raises(term_archive.ArchiveError, match="already exists"):
+        term_archive.close_term(data, data_file, "Term 2")
+
+    data["settings"]["term"] = "Term 1"
+    with pytest.raises(term_archive.ArchiveError, match="already archived"):
+        term_archive.close_term(data, data_file, "Term 9")
+    with pytest.raises(term_archive.ArchiveError):
+        term_archive.load_term(data_file, "Nope")
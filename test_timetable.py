@@ -0,0 +1,86 @@
+import datetime
+
+import pytest
+
+import term_archive
+import timetable
+
+MON = datetime.date(2026, 10, 19)
+SLOTS = [0, 2, 2]                        # Monday, and a double period on Wednesday
+HOLIDAYS = ["2026-10-21", "2026-11-02"]  # a Wednesday and a Monday
+
+
+def slot_days(start, days):
+    """Every class from `start` on, walking one day at a time."""
+    out = []
+    for i in range(days):
+        day = start + datetime.timedelta(days=i)
+        if day.isoformat() not in HOLIDAYS:
+            out += [day] * SLOTS.count(day.weekday())
+    return out
+
+
+def make_data(attended, total, term_end="2026-10-30"):
+    data = {"students": {"S": {"info": {}, "subjects": {"Phys": {"attended": attended, "total": total}}}},
+            "settings": {"goal": 75.0}}
+    timetable.set_slots(data, "Phys", [0])
+    timetable.set_term_end(data, timetable.parse_date(term_end))
+    return data
+
+
+@pytest.mark.parametrize("start_offset", range(7))
+def test_count_slots_and_nth_slot_date_match_walking_the_calendar(start_offset):
+    start = MON + datetime.timedelta(days=start_offset)
+    days = slot_days(start, 120)
+    for length in (0, 1, 6, 7, 8, 30, 100):
+        end = start + datetime.timedelta(days=length)
+        assert timetable.count_slots(SLOTS, HOLIDAYS, start, end) == sum(1 for d in days if d <= end)
+    for n in range(1, 40):
+        assert timetable.nth_slot_date(SLOTS, HOLIDAYS, start, n) == days[n - 1]
+
+
+def test_can_miss_is_capped_by_remaining_and_falls_below_stops_at_term_end():
+    p = timetable.project(make_data(10, 10), "S", "Phys", 75.0, MON)
+    assert p["remaining"] == 2
+    assert p["can_miss"] == 2
+    assert p["falls_below"] is None
+
+
+def test_projection_skips_classes_already_generated():
+    data = make_data(10, 10, term_end="2026-11-16")
+    assert timetable.project(data, "S", "Phys", 75.0, MON)["remaining"] == 5
+    timetable.generate(data, MON)
+    p = timetable.project(data, "S", "Phys", 75.0, MON)
+    assert p["remaining"] == 4
+    assert p["can_miss"] == 2
+    # 10 / (11 + k) < 0.75 from the third class on
+    assert p["falls_below"] == datetime.date(2026, 11, 9)
+
+
+def test_edit_trims_pending_and_confirm_never_exceeds_total():
+    data = make_data(0, 0)
+    timetable.generate(data, MON)
+    info = data["students"]["S"]["subjects"]["Phys"]
+    info.update(attended=0, total=0)
+    timetable.trim_pending(info)
+    assert "pending" not in info
+
+    info.update(attended=1, total=1, pending=[MON.isoformat()])
+    with pytest.raises(timetable.TimetableError):
+        timetable.confirm(data, "S", "Phys", attended=True)
+    assert info["attended"] == 1
+
+
+def test_closing_a_term_archives_the_timetable(tmp_path):
+    data_file = str(tmp_path / "data.json")
+    data = make_data(10, 10)
+    timetable.generate(data, MON)
+    term_archive.close_term(data, data_file, "Term 2")
+    assert "timetable" not in data
+    assert term_archive.load_term(data_file, "Current Term")["timetable"]["term_end"] == "2026-10-30"
+
+    data["students"]["S"]["subjects"]["Phys"] = {"attended": 0, "total": 0}
+    timetable.set_slots(data, "Phys", [0])
+    p = timetable.project(data, "S", "Phys", 75.0, MON)
+    assert p["remaining"] is None
+    assert p["falls_below"] == MON
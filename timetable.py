@@ -0,0 +1,246 @@
+# timetable.py
+"""
+Weekly timetable and session scheduler.
+
+Instead of clicking "Mark Missed"/"Mark Attended" for every class, subjects
+get weekly slots and generate() creates the classes held on a day for every
+student enrolled in them, in one pass and one save. A generated class counts
+as held but not attended ("pending") until it is confirmed, so percentages
+never look better than they are.
+
+Data kept in the data file:
+    "timetable": {"slots": {"Maths": [0, 2, 2]},   # weekday() numbers, Mon=0;
+                                                    # a day listed twice = two periods
+                  "holidays": ["2026-12-25"],
+                  "term_end": "2027-04-30",
+                  "last_generated": "2026-10-19"}
+    subject entry: {"attended": .., "total": .., "pending": ["2026-10-19", ...]}
+
+Generated classes travel through attendance_sync as ordinary counts, but the
+pending list stays on the machine that generated them, so generate and
+confirm on one machine.
+
+The timetable belongs to one term: term_archive.close_term() moves it into
+the archive, and the new term starts without slots, holidays or a term end.
+
+Projections (project()) are closed-form over the remaining slots; nothing is
+simulated one class at a time.
+"""
+import datetime
+import math
+
+import attendance_sync
+
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+
+class TimetableError(Exception):
+    """Raised for unknown weekdays, repeated generation, missing term end, ..."""
+
+
+def get_timetable(data):
+    tt = data.setdefault("timetable", {})
+    tt.setdefault("slots", {})
+    tt.setdefault("holidays", [])
+    return tt
+
+
+def parse_date(text):
+    try:
+        return datetime.date.fromisoformat(text)
+    except ValueError:
+        raise TimetableError(f"'{text}' is not a date (use YYYY-MM-DD).")
+
+
+def parse_weekday(text):
+    key = text.strip().lower()[:3]
+    if key not in WEEKDAYS:
+        raise TimetableError(f"'{text}' is not a weekday.")
+    return WEEKDAYS.index(key)
+
+
+def set_slots(data, subject, weekdays):
+    """Replaces the weekly slots of a subject; an empty list removes it."""
+    tt = get_timetable(data)
+    if weekdays:
+        tt["slots"][subject] = sorted(weekdays)
+    else:
+        tt["slots"].pop(subject, None)
+
+
+def add_holiday(data, day):
+    tt = get_timetable(data)
+    if day.isoformat() not in tt["holidays"]:
+        tt["holidays"].append(day.isoformat())
+        tt["holidays"].sort()
+
+
+def set_term_end(data, day):
+    get_timetable(data)["term_end"] = day.isoformat()
+
+
+# ---------------- Generation ----------------
+def generate(data, start, end=None):
+    """
+    Creates the classes from `start` to `end` (inclusive, default: just
+    `start`) for every student enrolled in a timetabled subject.
+    Days that were already generated are refused so a re-run cannot double
+    count. Returns the number of classes created. The caller saves once.
+    """
+    tt = get_timetable(data)
+    end = end or start
+    if end < start:
+        raise TimetableError("End date is before start date.")
+    last = tt.get("last_generated")
+    if last is not None and start <= parse_date(last):
+        raise TimetableError(f"Classes up to {last} were already generated.")
+
+    holidays = set(tt["holidays"])
+    # per subject: the dates (with repeats for double periods) held in the range
+    held = {}
+    day = start
+    while day <= end:
+        iso = day.isoformat()
+        if iso not in holidays:
+            for subject, slots in tt["slots"].items():
+                n = slots.count(day.weekday())
+                if n:
+                    held.setdefault(subject, []).extend([iso] * n)
+        day += datetime.timedelta(days=1)
+
+    created = 0
+    for student, st in data["students"].items():
+        for subject, dates in held.items():
+            info = st["subjects"].get(subject)
+            if info is None:
+                continue
+            info["total"] = info.get("total", 0) + len(dates)
+            info.setdefault("pending", []).extend(dates)
+            attendance_sync.record(data, "count", student=student, subject=subject,
+                                   attended=0, total=len(dates))
+            created += len(dates)
+    tt["last_generated"] = end.isoformat()
+    return created
+
+
+def confirm(data, student, subject, attended=True, day=None):
+    """
+    Settles one pending class (the oldest, or the one on `day`). Attended
+    classes add to `attended`; missed ones just stop being pending.
+    Returns False when the subject has nothing pending.
+    """
+    info = data["students"][student]["subjects"][subject]
+    pending = info.get("pending", [])
+    if not pending:
+        return False
+    if attended and info.get("attended", 0) >= info.get("total", 0):
+        raise TimetableError(f"{subject} already has every class marked attended.")
+    if day is None:
+        pending.pop(0)
+    elif day.isoformat() in pending:
+        pending.remove(day.isoformat())
+    else:
+        raise TimetableError(f"No pending {subject} class on {day.isoformat()}.")
+    if not pending:
+        del info["pending"]
+    if attended:
+        info["attended"] = info.get("attended", 0) + 1
+        attendance_sync.record(data, "count", student=student, subject=subject, attended=1, total=0)
+    return True
+
+
+def trim_pending(info):
+    """
+    Keeps at most total - attended pending classes (the most recent ones)
+    after attended/total were overwritten by an edit.
+    """
+    pending = info.get("pending")
+    if not pending:
+        return
+    keep = max(0, info.get("total", 0) - info.get("attended", 0))
+    del pending[:max(0, len(pending) - keep)]
+    if not pending:
+        del info["pending"]
+
+
+# ---------------- Closed-form slot arithmetic ----------------
+def _offsets(slots, start):
+    """Day offsets from `start` of each slot in the first week, sorted."""
+    return sorted((w - start.weekday()) % 7 for w in slots)
+
+
+def count_slots(slots, holidays, start, end):
+    """Number of classes between start and end (inclusive), minus holidays."""
+    if not slots or end < start:
+        return 0
+    weeks, rest = divmod((end - start).days + 1, 7)
+    count = weeks * len(slots) + sum(1 for off in _offsets(slots, start) if off < rest)
+    for iso in holidays:
+        h = parse_date(iso)
+        if start <= h <= end:
+            count -= slots.count(h.weekday())
+    return count
+
+
+def nth_slot_date(slots, holidays, start, n):
+    """Date of the n-th (1-based) class on or after `start`, skipping holidays."""
+    offsets = _offsets(slots, start)
+    skipped = 0
+    while True:
+        week, idx = divmod(n + skipped - 1, len(offsets))
+        day = start + datetime.timedelta(days=7 * week + offsets[idx])
+        # holidays are few, so this settles after a couple of rounds
+        lost = sum(slots.count(parse_date(h).weekday()) for h in holidays
+                   if start <= parse_date(h) <= day)
+        if lost == skipped:
+            return day
+        skipped = lost
+
+
+def project(data, student, subject, goal_percent, today):
+    """
+    Projection for one subject from `today` on, assuming the timetable holds.
+    Classes already generated (up to last_generated) are in `total` and are
+    not counted again. Returns a dict with:
+      below           whether the subject is below the goal now
+      remaining       classes left until term_end (None without a term end)
+      can_miss        how many of those can be missed and still end at the goal
+      falls_below     date the goal is lost if every class is missed
+                      (None if already below, or not before term_end)
+      recovers        date the goal is reached again if every class is attended
+                      (None if not below the goal, or not before term_end)
+    """
+    tt = get_timetable(data)
+    slots = tt["slots"].get(subject)
+    if not slots:
+        raise TimetableError(f"'{subject}' has no timetable slots.")
+    info = data["students"][student]["subjects"][subject]
+    a, t = info.get("attended", 0), info.get("total", 0)
+    g = goal_percent / 100.0
+    holidays = tt["holidays"]
+    start = today
+    if tt.get("last_generated"):
+        start = max(today, parse_date(tt["last_generated"]) + datetime.timedelta(days=1))
+
+    below = t > 0 and a < g * t
+    result = {"below": below, "remaining": None, "can_miss": None, "falls_below": None, "recovers": None}
+    term_end = parse_date(tt["term_end"]) if tt.get("term_end") else None
+    if term_end:
+        r = count_slots(slots, holidays, start, term_end)
+        result["remaining"] = r
+        # (a + r - m) / (t + r) >= g  <=>  m <= a + r - g (t + r)
+        result["can_miss"] = min(r, max(0, math.floor(a + r - g * (t + r) + 1e-9)))
+
+    if not below:
+        # missing k classes: a / (t + k) < g  <=>  k > a / g - t
+        k = math.floor(a / g - t + 1e-9) + 1
+        day = nth_slot_date(slots, holidays, start, k)
+        if term_end is None or day <= term_end:
+            result["falls_below"] = day
+    elif g < 1:
+        # attending k classes: (a + k) / (t + k) >= g  <=>  k >= (g t - a) / (1 - g)
+        k = max(1, math.ceil((g * t - a) / (1 - g) - 1e-9))
+        day = nth_slot_date(slots, holidays, start, k)
+        if term_end is None or day <= term_end:
+            result["recovers"] = day
+    return result
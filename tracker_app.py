@@ -1,7 +1,8 @@
-import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
+import bisect
 import json
 import os
+import tkinter as tk
+from tkinter import ttk, messagebox, simpledialog
 
 # --- 1. CONFIGURATION & STYLING ---
 DATA_FILE = "attendance_pro_data.json"
@@ -95,43 +96,73 @@ class AttendanceApp:
         file_menu.add_command(label="Reset All Data", command=self.reset_all_data)
         file_menu.add_command(label="Exit", command=self.root.quit)
 
+    def format_subject_rows(self, subject):
+        """Returns the (summary, status) listbox rows for one subject."""
+        data = self.app_data["subjects"][subject]
+        goal = self.attendance_goal.get() / 100.0
+        total, attended = data.get('total', 0), data.get('attended', 0)
+
+        if total == 0:
+            percentage = 100.0
+            status_msg = "No classes held yet."
+        else:
+            percentage = (attended / total) * 100
+            if percentage >= goal * 100:
+                can_miss = int((attended - (goal * total)) / goal)
+                status_msg = f"✅ Safe. You can miss the next {can_miss} classes."
+            else:
+                needed = -(-((goal * total) - attended) // (1 - goal))
+                status_msg = f"⚠️ Danger! Must attend the next {int(needed)} classes."
+
+        display_text = f"{subject}  |  {attended}/{total}  |  {percentage:.2f}%"
+        return display_text, f"  └ {status_msg}\n"
+
     def refresh_listbox(self):
+        """Rebuilds the whole listbox, keeping the selection. Used when every row changes (goal, reset)."""
+        selection = self.subject_listbox.curselection()
         self.subject_listbox.delete(0, tk.END)
-        subjects = self.app_data["subjects"]
-        goal = self.attendance_goal.get() / 100.0
+        # row_subjects[i] is the subject shown on listbox row i (two rows per subject)
+        self.row_subjects = []
 
-        if not subjects:
+        if not self.app_data["subjects"]:
             self.subject_listbox.insert(tk.END, "Add a subject to begin!")
             return
 
-        for subject, data in sorted(subjects.items()):
-            total, attended = data.get('total', 0), data.get('attended', 0)
-            
-            if total == 0:
-                percentage = 100.0
-                status_msg = "No classes held yet."
-            else:
-                percentage = (attended / total) * 100
-                if percentage >= goal * 100:
-                    can_miss = int((attended - (goal * total)) / goal)
-                    status_msg = f"✅ Safe. You can miss the next {can_miss} classes."
-                else:
-                    needed = -(-((goal * total) - attended) // (1 - goal))
-                    status_msg = f"⚠️ Danger! Must attend the next {int(needed)} classes."
-
-            display_text = f"{subject}  |  {attended}/{total}  |  {percentage:.2f}%"
-            self.subject_listbox.insert(tk.END, display_text)
-            self.subject_listbox.insert(tk.END, f"  └ {status_msg}\n")
+        for subject in sorted(self.app_data["subjects"]):
+            self.subject_listbox.insert(tk.END, *self.format_subject_rows(subject))
+            self.row_subjects += [subject, subject]
+        for i in selection:
+            if i < len(self.row_subjects):
+                self.subject_listbox.selection_set(i)
+
+    def update_subject_rows(self, subject):
+        """Redraws only the two rows of one subject, keeping the selection."""
+        index = self.row_subjects.index(subject)
+        selection = self.subject_listbox.curselection()
+        self.subject_listbox.delete(index, index + 1)
+        self.subject_listbox.insert(index, *self.format_subject_rows(subject))
+        for i in selection:
+            self.subject_listbox.selection_set(i)
+
+    def insert_subject_rows(self, subject):
+        """Inserts a new subject's rows at its sorted position."""
+        if not self.row_subjects:
+            self.subject_listbox.delete(0, tk.END)
+        index = bisect.bisect_left(self.row_subjects, subject)
+        self.subject_listbox.insert(index, *self.format_subject_rows(subject))
+        self.row_subjects[index:index] = [subject, subject]
+
+    def remove_subject_rows(self, subject):
+        index = self.row_subjects.index(subject)
+        self.subject_listbox.delete(index, index + 1)
+        del self.row_subjects[index:index + 2]
+        if not self.row_subjects:
+            self.subject_listbox.insert(tk.END, "Add a subject to begin!")
 
     def get_selected_subject(self):
         try:
             selected_index = self.subject_listbox.curselection()[0]
-            if selected_index % 2 != 0:
-                selected_index -= 1
-            
-            selected_text = self.subject_listbox.get(selected_index)
-            subject_name = selected_text.split('|')[0].strip()
-            return subject_name
+            return self.row_subjects[selected_index]
         except IndexError:
             messagebox.showwarning("No Selection", "Please select a subject from the list.")
             return None
@@ -141,7 +172,7 @@ class AttendanceApp:
         if subject_name and subject_name not in self.app_data["subjects"]:
             self.app_data["subjects"][subject_name] = {"attended": 0, "total": 0}
             save_data(self.app_data)
-            self.refresh_listbox()
+            self.insert_subject_rows(subject_name)
             self.subject_entry.delete(0, tk.END)
         elif not subject_name:
             messagebox.showerror("Error", "Subject name cannot be empty.")
@@ -157,7 +188,7 @@ class AttendanceApp:
             if messagebox.askyesno("Confirm Delete", f"Are you sure you want to permanently delete '{subject_name}'?"):
                 del self.app_data["subjects"][subject_name]
                 save_data(self.app_data)
-                self.refresh_listbox()
+                self.remove_subject_rows(subject_name)
 
     def mark_attended(self):
         subject = self.get_selected_subject()
@@ -165,14 +196,14 @@ class AttendanceApp:
             self.app_data["subjects"][subject]['attended'] += 1
             self.app_data["subjects"][subject]['total'] += 1
             save_data(self.app_data)
-            self.refresh_listbox()
+            self.update_subject_rows(subject)
 
     def mark_missed(self):
         subject = self.get_selected_subject()
         if subject:
             self.app_data["subjects"][subject]['total'] += 1
             save_data(self.app_data)
-            self.refresh_listbox()
+            self.update_subject_rows(subject)
             
     def open_edit_window(self):
         subject = self.get_selected_subject()
@@ -206,7 +237,7 @@ class AttendanceApp:
                 self.app_data["subjects"][subject]["attended"] = new_attended
                 self.app_data["subjects"][subject]["total"] = new_total
                 save_data(self.app_data)
-                self.refresh_listbox()
+                self.update_subject_rows(subject)
                 edit_win.destroy()
             except ValueError:
                 messagebox.showerror("Invalid Input", "Please enter valid numbers.", parent=edit_win)